@@ -2,15 +2,239 @@
 ETL Step 1: Extract
 ===================
 This module reads raw CSV files from the data/raw directory.
-It uses pandas for efficient CSV reading and data handling.
+It uses pyarrow's multithreaded CSV reader with explicit column types
+and returns Arrow-backed pandas DataFrames.
+Parsed files are cached as Parquet in data/processed so repeat runs
+skip CSV parsing until the source CSV changes.
 """
 
 import pandas as pd
+import pyarrow as pa
+from pyarrow import csv as pacsv
+from pyarrow import parquet as pq
 from pathlib import Path
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 
 # Get the project root directory (parent of etl folder)
 PROJECT_ROOT = Path(__file__).parent.parent
 RAW_DATA_DIR = PROJECT_ROOT / "data" / "raw"
+PROCESSED_DATA_DIR = PROJECT_ROOT / "data" / "processed"
+
+# Approximate number of sales rows per streamed chunk
+SALES_CHUNK_SIZE = 200_000
+
+# Bump when the CSV reader options change so old Parquet caches are not reused
+PARQUET_CACHE_VERSION = 2
+
+# Explicit column types for each raw file
+# Values that do not match these types fail at read time
+SALES_COLUMN_TYPES = {
+    'sale_id': pa.int64(),
+    'sale_date': pa.timestamp('ms'),
+    'customer_id': pa.int64(),
+    'product_id': pa.int64(),
+    'quantity': pa.int32(),
+    'unit_price': pa.float64(),
+    'total_amount': pa.float64()
+}
+
+CUSTOMERS_COLUMN_TYPES = {
+    'customer_id': pa.int64(),
+    'customer_name': pa.string(),
+    'email': pa.string(),
+    'city': pa.string(),
+    'country': pa.string()
+}
+
+PRODUCTS_COLUMN_TYPES = {
+    'product_id': pa.int64(),
+    'product_name': pa.string(),
+    'category': pa.string(),
+    'subcategory': pa.string(),
+    'unit_cost': pa.float64()
+}
+
+
+def downcast_numeric(df):
+    """
+    Downcast numeric columns to the smallest type that holds their values.
+    Non-negative integer columns become unsigned, floats become float32
+    where possible.
+    
+    Args:
+        df: pandas DataFrame
+    
+    Returns:
+        pandas.DataFrame: Dataframe with downcast numeric columns
+    """
+    for col in df.columns:
+        if pd.api.types.is_integer_dtype(df[col]):
+            downcast = 'unsigned' if (df[col] >= 0).all() else 'integer'
+            df[col] = pd.to_numeric(df[col], downcast=downcast)
+        elif pd.api.types.is_float_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], downcast='float')
+    
+    return df
+
+
+def csv_convert_options(column_types):
+    """
+    Build the pyarrow CSV convert options for a raw file.
+    Empty fields are read as missing values in every column (including
+    string columns), like pandas.read_csv.
+    
+    Args:
+        column_types: Mapping of column name to pyarrow type
+    
+    Returns:
+        pyarrow.csv.ConvertOptions: Options for read_csv/open_csv
+    """
+    return pacsv.ConvertOptions(column_types=column_types, strings_can_be_null=True)
+
+
+def locate_raw_csv(file_name, label):
+    """
+    Locate a raw CSV file and its Parquet cache.
+    
+    Args:
+        file_name: Name of the CSV file (e.g. 'sales.csv')
+        label: Human readable name used in error messages
+    
+    Returns:
+        tuple: (csv_path, parquet_path, use_cache) where use_cache is True
+               if the Parquet cache is at least as new as the CSV file
+    """
+    file_path = RAW_DATA_DIR / file_name
+    
+    if not file_path.exists():
+        raise FileNotFoundError(f"{label} file not found: {file_path}")
+    
+    parquet_path = (PROCESSED_DATA_DIR / file_name).with_suffix(
+        f'.v{PARQUET_CACHE_VERSION}.parquet'
+    )
+    use_cache = (
+        parquet_path.exists()
+        and parquet_path.stat().st_mtime >= file_path.stat().st_mtime
+    )
+    
+    return file_path, parquet_path, use_cache
+
+
+@contextmanager
+def partial_cache_path(parquet_path):
+    """
+    Provide a temporary path to write a Parquet cache file to.
+    The file replaces parquet_path only when the with-block completes, so
+    an interrupted write never leaves a truncated cache that looks valid.
+    
+    Args:
+        parquet_path: Path of the Parquet cache file
+    
+    Yields:
+        pathlib.Path: Path to write the new cache file to
+    """
+    PROCESSED_DATA_DIR.mkdir(parents=True, exist_ok=True)
+    partial_path = parquet_path.with_suffix('.parquet.partial')
+    
+    yield partial_path
+    
+    partial_path.replace(parquet_path)
+
+
+def read_raw_csv(file_name, label, column_types):
+    """
+    Read one raw CSV file from the data/raw directory.
+    A Parquet copy is written to data/processed and reused while it is
+    newer than the CSV file.
+    
+    Args:
+        file_name: Name of the CSV file (e.g. 'sales.csv')
+        label: Human readable name used in error messages
+        column_types: Mapping of column name to pyarrow type
+    
+    Returns:
+        pandas.DataFrame: Raw file contents with Arrow-backed,
+                          downcast numeric columns
+    """
+    file_path, parquet_path, use_cache = locate_raw_csv(file_name, label)
+    
+    if use_cache:
+        table = pq.read_table(parquet_path)
+    else:
+        # Read CSV file with a fixed schema (no type inference pass)
+        convert_options = csv_convert_options(column_types)
+        table = pacsv.read_csv(file_path, convert_options=convert_options)
+        
+        # Cache the parsed table for the next run
+        with partial_cache_path(parquet_path) as partial_path:
+            pq.write_table(table, partial_path, compression='snappy')
+    
+    # Shrink numeric columns so less data moves through the pipeline
+    return downcast_numeric(table.to_pandas(types_mapper=pd.ArrowDtype))
+
+
+def stream_csv_batches(file_path, parquet_path, column_types, chunksize):
+    """
+    Stream a CSV file as Arrow tables of about chunksize rows.
+    Batches are also written to the Parquet cache, which only replaces
+    the previous cache once the whole file has been read.
+    
+    Args:
+        file_path: Path of the CSV file
+        parquet_path: Path of the Parquet cache file
+        column_types: Mapping of column name to pyarrow type
+        chunksize: Approximate number of rows per yielded table
+    
+    Yields:
+        pyarrow.Table: Next chunk of rows
+    """
+    convert_options = csv_convert_options(column_types)
+    reader = pacsv.open_csv(file_path, convert_options=convert_options)
+    
+    with partial_cache_path(parquet_path) as partial_path:
+        with pq.ParquetWriter(partial_path, reader.schema, compression='snappy') as writer:
+            pending = []
+            pending_rows = 0
+            
+            for batch in reader:
+                writer.write_batch(batch)
+                pending.append(batch)
+                pending_rows += batch.num_rows
+                
+                if pending_rows >= chunksize:
+                    yield pa.Table.from_batches(pending)
+                    pending = []
+                    pending_rows = 0
+            
+            if pending:
+                yield pa.Table.from_batches(pending)
+
+
+def iter_raw_csv(file_name, label, column_types, chunksize):
+    """
+    Read one raw CSV file from the data/raw directory in chunks.
+    Uses the same Parquet cache as read_raw_csv().
+    
+    Args:
+        file_name: Name of the CSV file (e.g. 'sales.csv')
+        label: Human readable name used in error messages
+        column_types: Mapping of column name to pyarrow type
+        chunksize: Approximate number of rows per chunk
+    
+    Yields:
+        pandas.DataFrame: Next chunk with Arrow-backed,
+                          downcast numeric columns
+    """
+    file_path, parquet_path, use_cache = locate_raw_csv(file_name, label)
+    
+    if use_cache:
+        batches = pq.ParquetFile(parquet_path).iter_batches(batch_size=chunksize)
+    else:
+        batches = stream_csv_batches(file_path, parquet_path, column_types, chunksize)
+    
+    for batch in batches:
+        yield downcast_numeric(batch.to_pandas(types_mapper=pd.ArrowDtype))
 
 
 def extract_sales_data():
@@ -22,18 +246,32 @@ def extract_sales_data():
             - sale_id, sale_date, customer_id, product_id,
               quantity, unit_price, total_amount
     """
-    file_path = RAW_DATA_DIR / "sales.csv"
-    
-    if not file_path.exists():
-        raise FileNotFoundError(f"Sales file not found: {file_path}")
-    
-    # Read CSV file
-    df = pd.read_csv(file_path)
+    df = read_raw_csv("sales.csv", "Sales", SALES_COLUMN_TYPES)
     
     print(f"✓ Extracted {len(df)} sales records from sales.csv")
     return df
 
 
+def extract_sales_chunks(chunksize=SALES_CHUNK_SIZE):
+    """
+    Extract sales data from CSV file in chunks.
+    Keeps peak memory proportional to the chunk size instead of the file.
+    
+    Args:
+        chunksize: Approximate number of rows per chunk
+    
+    Yields:
+        pandas.DataFrame: Chunk of sales data with the same columns
+                          as extract_sales_data()
+    """
+    total = 0
+    
+    for df in iter_raw_csv("sales.csv", "Sales", SALES_COLUMN_TYPES, chunksize):
+        total += len(df)
+        print(f"✓ Extracted {len(df)} sales records from sales.csv ({total} so far)")
+        yield df
+
+
 def extract_customers_data():
     """
     Extract customer data from CSV file.
@@ -42,13 +280,7 @@ def extract_customers_data():
         pandas.DataFrame: Customer data with columns:
             - customer_id, customer_name, email, city, country
     """
-    file_path = RAW_DATA_DIR / "customers.csv"
-    
-    if not file_path.exists():
-        raise FileNotFoundError(f"Customers file not found: {file_path}")
-    
-    # Read CSV file
-    df = pd.read_csv(file_path)
+    df = read_raw_csv("customers.csv", "Customers", CUSTOMERS_COLUMN_TYPES)
     
     print(f"✓ Extracted {len(df)} customer records from customers.csv")
     return df
@@ -62,18 +294,37 @@ def extract_products_data():
         pandas.DataFrame: Product data with columns:
             - product_id, product_name, category, subcategory, unit_cost
     """
-    file_path = RAW_DATA_DIR / "products.csv"
-    
-    if not file_path.exists():
-        raise FileNotFoundError(f"Products file not found: {file_path}")
-    
-    # Read CSV file
-    df = pd.read_csv(file_path)
+    df = read_raw_csv("products.csv", "Products", PRODUCTS_COLUMN_TYPES)
     
     print(f"✓ Extracted {len(df)} product records from products.csv")
     return df
 
 
+def extract_dimension_data():
+    """
+    Extract the customer and product files concurrently.
+    Sales data is read separately in chunks (see extract_sales_chunks()).
+    
+    Returns:
+        tuple: (customers_df, products_df)
+    """
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        customers_future = executor.submit(
+            read_raw_csv, "customers.csv", "Customers", CUSTOMERS_COLUMN_TYPES
+        )
+        products_future = executor.submit(
+            read_raw_csv, "products.csv", "Products", PRODUCTS_COLUMN_TYPES
+        )
+        
+        customers_df = customers_future.result()
+        products_df = products_future.result()
+    
+    print(f"✓ Extracted {len(customers_df)} customer records from customers.csv")
+    print(f"✓ Extracted {len(products_df)} product records from products.csv")
+    
+    return customers_df, products_df
+
+
 def extract_all():
     """
     Extract all data files at once.
@@ -85,9 +336,16 @@ def extract_all():
     print("EXTRACTING DATA FROM CSV FILES")
     print("=" * 50)
     
-    sales_df = extract_sales_data()
-    customers_df = extract_customers_data()
-    products_df = extract_products_data()
+    # Read the files concurrently (the Arrow reader releases the GIL while parsing):
+    # sales in the background while the dimension files are read
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        sales_future = executor.submit(
+            read_raw_csv, "sales.csv", "Sales", SALES_COLUMN_TYPES
+        )
+        customers_df, products_df = extract_dimension_data()
+        sales_df = sales_future.result()
+    
+    print(f"✓ Extracted {len(sales_df)} sales records from sales.csv")
     
     print("=" * 50)
     print("EXTRACTION COMPLETE")
@@ -2,13 +2,15 @@
 ETL Step 3: Load
 ================
 This module loads transformed data into PostgreSQL database.
-It uses transactions to ensure data integrity.
+The whole load runs in a single transaction to ensure data integrity:
+the loaders below do not commit, load_all_chunked() commits once at the end.
 """
 
+import io
 import psycopg2
 from psycopg2 import sql
-from psycopg2.extras import execute_values
-import pandas as pd
+import pyarrow as pa
+from pyarrow import csv as pacsv
 from pathlib import Path
 
 # Database connection parameters
@@ -21,6 +23,56 @@ DB_CONFIG = {
     'port': 5432
 }
 
+# Frames with fewer rows than this are sent inline as unnest() arrays in
+# a single statement; larger frames are streamed with COPY into staging
+COPY_MIN_ROWS = 1000
+
+# Column names and SQL types of the rows staged for each table
+DIM_CUSTOMER_COLUMNS = {
+    'customer_id': 'INTEGER',
+    'customer_name': 'VARCHAR',
+    'email': 'VARCHAR',
+    'city': 'VARCHAR',
+    'country': 'VARCHAR'
+}
+
+DIM_PRODUCT_COLUMNS = {
+    'product_id': 'INTEGER',
+    'product_name': 'VARCHAR',
+    'category': 'VARCHAR',
+    'subcategory': 'VARCHAR',
+    'unit_cost': 'DECIMAL'
+}
+
+DIM_DATE_COLUMNS = {
+    'sale_date': 'DATE',
+    'day': 'INTEGER',
+    'month': 'INTEGER',
+    'quarter': 'INTEGER',
+    'year': 'INTEGER',
+    'month_name': 'VARCHAR',
+    'quarter_name': 'VARCHAR',
+    'day_of_week': 'VARCHAR',
+    'is_weekend': 'BOOLEAN'
+}
+
+# Sales are only loaded into fact_sales, and their dates only added to
+# dim_date, when this holds (fact_sales enforces the same rule with its
+# positive_amounts CHECK constraint in sql/create_tables.sql)
+POSITIVE_AMOUNTS_SQL = "quantity > 0 AND unit_price > 0 AND total_amount > 0"
+
+# Sales rows are staged with natural keys; surrogate keys are looked up
+# by joining the staged rows to the dimension tables
+SALES_STAGE_COLUMNS = {
+    'sale_id': 'INTEGER',
+    'sale_date': 'DATE',
+    'customer_id': 'INTEGER',
+    'product_id': 'INTEGER',
+    'quantity': 'INTEGER',
+    'unit_price': 'DECIMAL',
+    'total_amount': 'DECIMAL'
+}
+
 
 def get_connection():
     """
@@ -61,6 +113,84 @@ def execute_sql_file(conn, file_path):
         cursor.close()
 
 
+def copy_to_staging(cursor, df, staging_table, column_types):
+    """
+    Bulk copy dataframe columns into a temporary staging table.
+    The staging table is dropped on commit. Within one transaction it is
+    created once and emptied before each copy, so it can be reused for
+    every chunk of a streamed load.
+    
+    Args:
+        cursor: Database cursor
+        df: Dataframe holding the rows to stage
+        staging_table: Name of the temporary staging table
+        column_types: Mapping of column name to SQL type
+    """
+    columns = list(column_types)
+    column_list = ', '.join(columns)
+    column_defs = ', '.join(f"{col} {sql_type}" for col, sql_type in column_types.items())
+    
+    # Create staging table (plain columns, no keys or defaults)
+    cursor.execute(f"""
+        CREATE TEMP TABLE IF NOT EXISTS {staging_table} ({column_defs})
+        ON COMMIT DROP
+    """)
+    cursor.execute(f"TRUNCATE {staging_table}")
+    
+    # Convert to an Arrow table (zero-copy for Arrow-backed columns)
+    # DATE columns are written as plain dates, categoricals as their labels
+    table = pa.Table.from_pandas(df[columns], preserve_index=False)
+    for i, (col, sql_type) in enumerate(column_types.items()):
+        field_type = table.schema.field(i).type
+        if sql_type == 'DATE':
+            table = table.set_column(i, col, table.column(i).cast(pa.date32()))
+        elif pa.types.is_dictionary(field_type):
+            table = table.set_column(i, col, table.column(i).cast(field_type.value_type))
+    
+    # Write rows to an in-memory CSV buffer with Arrow's C++ writer and
+    # stream it with COPY (nulls are written as unquoted empty fields)
+    buffer = io.BytesIO()
+    pacsv.write_csv(table, buffer, pacsv.WriteOptions(include_header=False))
+    buffer.seek(0)
+    
+    cursor.copy_expert(
+        f"COPY {staging_table} ({column_list}) FROM STDIN WITH (FORMAT CSV)",
+        buffer
+    )
+
+
+def stage_rows(cursor, df, staging_table, column_types):
+    """
+    Stage dataframe rows as the source of a set-based upsert.
+    Small frames are passed as one array per column and expanded with
+    unnest(), so no temporary table is created. Larger frames are
+    copied into a temporary staging table.
+    
+    Args:
+        cursor: Database cursor
+        df: Dataframe holding the rows to stage
+        staging_table: Name the staged rows are available under
+        column_types: Mapping of column name to SQL type
+    
+    Returns:
+        tuple: (source_sql, params) for the FROM clause of the upsert
+    """
+    columns = list(column_types)
+    
+    if len(df) < COPY_MIN_ROWS:
+        # One array parameter per column, missing values sent as NULL
+        arrays = ', '.join(f"%s::{sql_type}[]" for sql_type in column_types.values())
+        source_sql = f"unnest({arrays}) AS {staging_table} ({', '.join(columns)})"
+        params = [
+            df[col].astype(object).where(df[col].notna(), None).tolist()
+            for col in columns
+        ]
+        return source_sql, params
+    
+    copy_to_staging(cursor, df, staging_table, column_types)
+    return staging_table, []
+
+
 def load_dim_customer(conn, customers_df):
     """
     Load customer dimension data.
@@ -74,12 +204,15 @@ def load_dim_customer(conn, customers_df):
     cursor = conn.cursor()
     
     try:
-        # Prepare data for insertion
-        records = customers_df.to_dict('records')
+        # Stage rows, then upsert them in a single statement
+        source_sql, params = stage_rows(
+            cursor, customers_df, 'stg_dim_customer', DIM_CUSTOMER_COLUMNS
+        )
         
-        insert_query = """
+        upsert_query = f"""
             INSERT INTO dim_customer (customer_id, customer_name, email, city, country)
-            VALUES %s
+            SELECT customer_id, customer_name, email, city, country
+            FROM {source_sql}
             ON CONFLICT (customer_id) DO UPDATE SET
                 customer_name = EXCLUDED.customer_name,
                 email = EXCLUDED.email,
@@ -88,13 +221,9 @@ def load_dim_customer(conn, customers_df):
                 updated_at = CURRENT_TIMESTAMP
         """
         
-        values = [(r['customer_id'], r['customer_name'], r['email'], 
-                  r['city'], r['country']) for r in records]
-        
-        execute_values(cursor, insert_query, values)
-        conn.commit()
+        cursor.execute(upsert_query, params)
         
-        print(f"✓ Loaded {len(records)} customer records")
+        print(f"✓ Loaded {len(customers_df)} customer records")
         
     except psycopg2.Error as e:
         conn.rollback()
@@ -117,12 +246,15 @@ def load_dim_product(conn, products_df):
     cursor = conn.cursor()
     
     try:
-        # Prepare data for insertion
-        records = products_df.to_dict('records')
+        # Stage rows, then upsert them in a single statement
+        source_sql, params = stage_rows(
+            cursor, products_df, 'stg_dim_product', DIM_PRODUCT_COLUMNS
+        )
         
-        insert_query = """
+        upsert_query = f"""
             INSERT INTO dim_product (product_id, product_name, category, subcategory, unit_cost)
-            VALUES %s
+            SELECT product_id, product_name, category, subcategory, unit_cost
+            FROM {source_sql}
             ON CONFLICT (product_id) DO UPDATE SET
                 product_name = EXCLUDED.product_name,
                 category = EXCLUDED.category,
@@ -131,13 +263,9 @@ def load_dim_product(conn, products_df):
                 updated_at = CURRENT_TIMESTAMP
         """
         
-        values = [(r['product_id'], r['product_name'], r['category'], 
-                  r['subcategory'], r['unit_cost']) for r in records]
-        
-        execute_values(cursor, insert_query, values)
-        conn.commit()
+        cursor.execute(upsert_query, params)
         
-        print(f"✓ Loaded {len(records)} product records")
+        print(f"✓ Loaded {len(products_df)} product records")
         
     except psycopg2.Error as e:
         conn.rollback()
@@ -147,6 +275,167 @@ def load_dim_product(conn, products_df):
         cursor.close()
 
 
+def upsert_dim_date(cursor, date_df, sales_source_sql=None, sales_params=()):
+    """
+    Insert new dates into the date dimension (existing dates are kept).
+    When staged sales are given, only dates used by staged sales that
+    will be loaded into fact_sales are inserted (see stage_sales()).
+    
+    Args:
+        cursor: Database cursor
+        date_df: Date dimension dataframe
+        sales_source_sql: Optional FROM clause of the staged sales rows
+        sales_params: Query parameters of sales_source_sql
+    
+    Returns:
+        int: Number of new date records inserted
+    """
+    # Stage rows, then insert new dates in a single statement
+    source_sql, params = stage_rows(
+        cursor, date_df, 'stg_dim_date', DIM_DATE_COLUMNS
+    )
+    
+    sales_filter = ''
+    if sales_source_sql is not None:
+        # Skip dates of sales that the fact upsert rejects or skips as a
+        # sale_id already loaded from an earlier chunk
+        sales_filter = f"""
+            WHERE sale_date IN (
+                SELECT sale_date
+                FROM {sales_source_sql}
+                LEFT JOIN loaded_sale_ids USING (sale_id)
+                WHERE loaded_sale_ids.sale_id IS NULL
+                  AND {POSITIVE_AMOUNTS_SQL}
+            )
+        """
+        params = list(params) + list(sales_params)
+    
+    insert_query = f"""
+        INSERT INTO dim_date (sale_date, day, month, quarter, year, 
+                             month_name, quarter_name, day_of_week, is_weekend)
+        SELECT sale_date, day, month, quarter, year,
+               month_name, quarter_name, day_of_week, is_weekend
+        FROM {source_sql}
+        {sales_filter}
+        ON CONFLICT (sale_date) DO NOTHING
+    """
+    
+    cursor.execute(insert_query, params)
+    
+    return cursor.rowcount
+
+
+def stage_sales(cursor, sales_df):
+    """
+    Stage sales rows with their natural keys for upsert_fact_sales().
+    Also creates the temporary table of sale_ids loaded earlier in the
+    transaction, which lives until the transaction commits.
+    
+    Args:
+        cursor: Database cursor
+        sales_df: Transformed sales dataframe
+    
+    Returns:
+        tuple: (source_sql, params) for the FROM clause of the upsert
+    """
+    # sale_ids staged earlier in this transaction
+    cursor.execute(f"""
+        CREATE TEMP TABLE IF NOT EXISTS loaded_sale_ids (
+            sale_id {SALES_STAGE_COLUMNS['sale_id']} PRIMARY KEY
+        )
+        ON COMMIT DROP
+    """)
+    
+    return stage_rows(cursor, sales_df, 'stg_sales', SALES_STAGE_COLUMNS)
+
+
+def upsert_fact_sales(cursor, sales_df, source_sql, params):
+    """
+    Upsert staged sales fact rows.
+    Rows are staged with their natural keys and joined to the dimension
+    tables in the database to get surrogate keys, so no dimension data
+    is read back into Python.
+    
+    Every staged sale_id is recorded in a temporary table that lives until
+    the transaction commits. A sale_id that was already staged by an
+    earlier call in the same transaction (an earlier sales chunk) is
+    skipped, so the first occurrence in the file wins across chunks. The
+    table costs PostgreSQL one indexed integer per sale (spilled to disk
+    by the server once it outgrows temp_buffers), not Python memory. Rows
+    dropped as incomplete by the transform step are never staged, so they
+    do not count as a first occurrence.
+    
+    Args:
+        cursor: Database cursor
+        sales_df: Transformed sales dataframe
+        source_sql: FROM clause of the staged rows (from stage_sales())
+        params: Query parameters of source_sql
+    
+    Returns:
+        int: Number of sales fact records loaded
+    """
+    # Record new sale_ids, look up surrogate keys and upsert in a single
+    # statement, which also reports how many rows were skipped and why,
+    # so the staged rows are joined to the dimension tables only once
+    # (fact_sales also rejects non-positive amounts with a CHECK constraint)
+    upsert_query = f"""
+        WITH staged AS (
+            SELECT sale_id, date_key, customer_key, product_key,
+                   quantity, unit_price, total_amount
+            FROM {source_sql}
+            LEFT JOIN dim_date USING (sale_date)
+            LEFT JOIN dim_customer USING (customer_id)
+            LEFT JOIN dim_product USING (product_id)
+        ),
+        first_seen AS (
+            INSERT INTO loaded_sale_ids (sale_id)
+            SELECT sale_id FROM staged
+            ON CONFLICT (sale_id) DO NOTHING
+            RETURNING sale_id
+        ),
+        upserted AS (
+            INSERT INTO fact_sales (sale_id, date_key, customer_key, product_key, 
+                                   quantity, unit_price, total_amount)
+            SELECT sale_id, date_key, customer_key, product_key,
+                   quantity, unit_price, total_amount
+            FROM staged
+            JOIN first_seen USING (sale_id)
+            WHERE {POSITIVE_AMOUNTS_SQL}
+              AND date_key IS NOT NULL
+              AND customer_key IS NOT NULL
+              AND product_key IS NOT NULL
+            ON CONFLICT (sale_id) DO UPDATE SET
+                quantity = EXCLUDED.quantity,
+                unit_price = EXCLUDED.unit_price,
+                total_amount = EXCLUDED.total_amount
+            RETURNING 1
+        )
+        SELECT
+            count(*),
+            count(*) FILTER (WHERE NOT ({POSITIVE_AMOUNTS_SQL})),
+            (SELECT count(*) FROM upserted)
+        FROM staged
+        JOIN first_seen USING (sale_id)
+    """
+    
+    cursor.execute(upsert_query, params)
+    first_seen, invalid, loaded = cursor.fetchone()
+    
+    # Data quality issues
+    duplicates = len(sales_df) - first_seen
+    if duplicates > 0:
+        print(f"  → Skipped {duplicates} records whose sale_id appeared in an earlier chunk")
+    
+    if invalid > 0:
+        print(f"  → Skipped {invalid} records with non-positive quantity or prices")
+    
+    missing = first_seen - invalid - loaded
+    if missing > 0:
+        print(f"  → Skipped {missing} records due to missing dimension keys")
+    
+    return loaded
+
+
 def load_dim_date(conn, date_df):
     """
     Load date dimension data.
@@ -160,24 +449,9 @@ def load_dim_date(conn, date_df):
     cursor = conn.cursor()
     
     try:
-        # Prepare data for insertion
-        records = date_df.to_dict('records')
+        loaded = upsert_dim_date(cursor, date_df)
         
-        insert_query = """
-            INSERT INTO dim_date (sale_date, day, month, quarter, year, 
-                                 month_name, quarter_name, day_of_week, is_weekend)
-            VALUES %s
-            ON CONFLICT (sale_date) DO NOTHING
-        """
-        
-        values = [(r['sale_date'], r['day'], r['month'], r['quarter'], 
-                  r['year'], r['month_name'], r['quarter_name'], 
-                  r['day_of_week'], r['is_weekend']) for r in records]
-        
-        execute_values(cursor, insert_query, values)
-        conn.commit()
-        
-        print(f"✓ Loaded {len(records)} date records")
+        print(f"✓ Loaded {loaded} new date records")
         
     except psycopg2.Error as e:
         conn.rollback()
@@ -201,91 +475,65 @@ def load_fact_sales(conn, sales_df):
     cursor = conn.cursor()
     
     try:
-        # First, get all dimension keys for lookups
-        # Get date keys
-        date_lookup = {}
-        cursor.execute("SELECT date_key, sale_date FROM dim_date")
-        for row in cursor.fetchall():
-            date_lookup[pd.to_datetime(row[1]).date()] = row[0]
-        
-        # Get customer keys
-        customer_lookup = {}
-        cursor.execute("SELECT customer_key, customer_id FROM dim_customer")
-        for row in cursor.fetchall():
-            customer_lookup[row[1]] = row[0]
-        
-        # Get product keys
-        product_lookup = {}
-        cursor.execute("SELECT product_key, product_id FROM dim_product")
-        for row in cursor.fetchall():
-            product_lookup[row[1]] = row[0]
+        source_sql, params = stage_sales(cursor, sales_df)
+        loaded = upsert_fact_sales(cursor, sales_df, source_sql, params)
         
-        # Prepare fact records with surrogate keys
-        fact_records = []
-        skipped = 0
+        print(f"✓ Loaded {loaded} sales fact records")
         
-        for _, row in sales_df.iterrows():
-            sale_date = pd.to_datetime(row['sale_date']).date()
-            customer_id = int(row['customer_id'])
-            product_id = int(row['product_id'])
-            
-            # Lookup surrogate keys
-            date_key = date_lookup.get(sale_date)
-            customer_key = customer_lookup.get(customer_id)
-            product_key = product_lookup.get(product_id)
-            
-            # Skip if any lookup fails (data quality issue)
-            if not all([date_key, customer_key, product_key]):
-                skipped += 1
-                continue
-            
-            fact_records.append((
-                int(row['sale_id']),
-                date_key,
-                customer_key,
-                product_key,
-                int(row['quantity']),
-                float(row['unit_price']),
-                float(row['total_amount'])
-            ))
-        
-        if skipped > 0:
-            print(f"  → Skipped {skipped} records due to missing dimension keys")
-        
-        # Insert fact records
-        insert_query = """
-            INSERT INTO fact_sales (sale_id, date_key, customer_key, product_key, 
-                                   quantity, unit_price, total_amount)
-            VALUES %s
-            ON CONFLICT (sale_id) DO UPDATE SET
-                quantity = EXCLUDED.quantity,
-                unit_price = EXCLUDED.unit_price,
-                total_amount = EXCLUDED.total_amount
-        """
+    except psycopg2.Error as e:
+        conn.rollback()
+        print(f"Error loading sales fact table: {e}")
+        raise
+    finally:
+        cursor.close()
+
+
+def load_sales_chunks(conn, sales_chunks):
+    """
+    Load sales facts chunk by chunk, with the date dimension rows each
+    chunk needs. All chunks share one cursor and the caller's transaction.
+    
+    Args:
+        conn: Database connection
+        sales_chunks: Iterable of (sales_df, date_df) tuples
+    """
+    print("\nLoading Date Dimension and Sales Fact Table...")
+    
+    cursor = conn.cursor()
+    
+    try:
+        dates_loaded = 0
+        sales_loaded = 0
         
-        execute_values(cursor, insert_query, fact_records)
-        conn.commit()
+        for sales_df, date_df in sales_chunks:
+            # Stage sales first, so only dates of sales that will be loaded
+            # are added, then dates (required for fact table foreign keys)
+            source_sql, params = stage_sales(cursor, sales_df)
+            dates_loaded += upsert_dim_date(cursor, date_df, source_sql, params)
+            sales_loaded += upsert_fact_sales(cursor, sales_df, source_sql, params)
+            print(f"  → Loaded chunk of {len(sales_df)} sales records")
         
-        print(f"✓ Loaded {len(fact_records)} sales fact records")
+        print(f"✓ Loaded {dates_loaded} new date records")
+        print(f"✓ Loaded {sales_loaded} sales fact records")
         
     except psycopg2.Error as e:
         conn.rollback()
-        print(f"Error loading sales fact table: {e}")
+        print(f"Error loading sales chunks: {e}")
         raise
     finally:
         cursor.close()
 
 
-def load_all(sales_df, customers_df, products_df, date_df):
+def load_all_chunked(sales_chunks, customers_df, products_df):
     """
-    Load all data into the data warehouse.
-    This is the main load function that orchestrates the entire load process.
+    Load all data into the data warehouse, streaming sales in chunks.
+    Customer and product dimensions are loaded in full first, then each
+    sales chunk is loaded together with its date dimension rows.
     
     Args:
-        sales_df: Transformed sales dataframe
+        sales_chunks: Iterable of (sales_df, date_df) tuples
         customers_df: Transformed customers dataframe
         products_df: Transformed products dataframe
-        date_df: Date dimension dataframe
     """
     print("=" * 50)
     print("LOADING DATA INTO DATA WAREHOUSE")
@@ -305,13 +553,20 @@ def load_all(sales_df, customers_df, products_df, date_df):
         # sql_file = project_root / "sql" / "create_tables.sql"
         # execute_sql_file(conn, sql_file)
         
-        # Load dimensions first (required for fact table foreign keys)
-        load_dim_customer(conn, customers_df)
-        load_dim_product(conn, products_df)
-        load_dim_date(conn, date_df)
-        
-        # Load fact table last (depends on dimensions)
-        load_fact_sales(conn, sales_df)
+        # One transaction for the whole load: commits once on success,
+        # rolls back everything on error (no partially loaded warehouse)
+        with conn:
+            with conn.cursor() as cursor:
+                # The load is idempotent and can be re-run, so it does not
+                # need to wait for the WAL flush when committing
+                cursor.execute("SET LOCAL synchronous_commit = off")
+            
+            # Load dimensions first (required for fact table foreign keys)
+            load_dim_customer(conn, customers_df)
+            load_dim_product(conn, products_df)
+            
+            # Load dates and facts chunk by chunk (depends on dimensions)
+            load_sales_chunks(conn, sales_chunks)
         
         print("=" * 50)
         print("DATA LOADING COMPLETE")
@@ -326,6 +581,21 @@ def load_all(sales_df, customers_df, products_df, date_df):
             print("✓ Database connection closed")
 
 
+def load_all(sales_df, customers_df, products_df, date_df):
+    """
+    Load all data into the data warehouse.
+    This is the main load function that orchestrates the entire load process.
+    The in-memory sales data is loaded as a single chunk.
+    
+    Args:
+        sales_df: Transformed sales dataframe
+        customers_df: Transformed customers dataframe
+        products_df: Transformed products dataframe
+        date_df: Date dimension dataframe
+    """
+    load_all_chunked([(sales_df, date_df)], customers_df, products_df)
+
+
 if __name__ == "__main__":
     # Test loading (requires extract and transform modules)
     from extract import extract_all
@@ -5,9 +5,32 @@ This module cleans and transforms the extracted data.
 It handles data quality issues and creates the date dimension.
 """
 
+import numpy as np
 import pandas as pd
 from datetime import datetime
 
+# numba is optional: it only speeds up very large date dimensions
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# Date dimensions with more unique dates than this use the numba kernel
+NUMBA_MIN_DATES = 50_000
+
+# Fixed categories for date dimension names
+# Stored as 1-byte category codes instead of one Python string per row
+MONTH_NAME_DTYPE = pd.CategoricalDtype(
+    ['January', 'February', 'March', 'April', 'May', 'June',
+     'July', 'August', 'September', 'October', 'November', 'December'],
+    ordered=True
+)
+QUARTER_NAME_DTYPE = pd.CategoricalDtype(['Q1', 'Q2', 'Q3', 'Q4'], ordered=True)
+DAY_NAME_DTYPE = pd.CategoricalDtype(
+    ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'],
+    ordered=True
+)
+
 
 def remove_duplicates(df, subset=None):
     """
@@ -51,12 +74,11 @@ def handle_missing_values(df, strategy='drop'):
             print(f"  → Removed {removed} rows with missing values")
     else:
         # Fill numeric columns with 0, string columns with 'Unknown'
-        df_cleaned = df.copy()
-        for col in df_cleaned.columns:
-            if df_cleaned[col].dtype in ['int64', 'float64']:
-                df_cleaned[col].fillna(0, inplace=True)
-            else:
-                df_cleaned[col].fillna('Unknown', inplace=True)
+        fill_values = {
+            col: 0 if pd.api.types.is_numeric_dtype(df[col]) else 'Unknown'
+            for col in df.columns
+        }
+        df_cleaned = df.fillna(fill_values)
         print(f"  → Filled missing values")
     
     return df_cleaned
@@ -73,27 +95,22 @@ def transform_sales_data(sales_df):
         pandas.DataFrame: Cleaned sales dataframe
     """
     print("\nTransforming Sales Data...")
-    df = sales_df.copy()
     
-    # Remove duplicates based on sale_id
-    df = remove_duplicates(df, subset=['sale_id'])
+    # Convert sale_date to datetime (unparseable dates become missing)
+    # (numeric column types are already enforced when the CSV is read)
+    df = sales_df.assign(sale_date=pd.to_datetime(sales_df['sale_date'], errors='coerce'))
     
-    # Handle missing values
-    df = handle_missing_values(df, strategy='drop')
+    # Build one row filter instead of filtering in several passes:
+    # - first occurrence of each sale_id only
+    # - no missing values
+    # (positive quantity and prices are enforced when loading into fact_sales)
+    mask = ~df['sale_id'].duplicated() & df.notna().all(axis=1)
     
-    # Convert sale_date to datetime
-    df['sale_date'] = pd.to_datetime(df['sale_date'])
-    
-    # Ensure numeric columns are correct type
-    df['quantity'] = pd.to_numeric(df['quantity'], errors='coerce')
-    df['unit_price'] = pd.to_numeric(df['unit_price'], errors='coerce')
-    df['total_amount'] = pd.to_numeric(df['total_amount'], errors='coerce')
-    
-    # Remove rows where critical numeric fields are invalid
-    df = df.dropna(subset=['quantity', 'unit_price', 'total_amount'])
+    removed = len(df) - int(mask.sum())
+    if removed > 0:
+        print(f"  → Removed {removed} duplicate or incomplete rows")
     
-    # Ensure quantity and prices are positive
-    df = df[(df['quantity'] > 0) & (df['unit_price'] > 0) & (df['total_amount'] > 0)]
+    df = df.loc[mask].reset_index(drop=True)
     
     print(f"✓ Transformed {len(df)} sales records")
     return df
@@ -110,19 +127,14 @@ def transform_customers_data(customers_df):
         pandas.DataFrame: Cleaned customers dataframe
     """
     print("\nTransforming Customers Data...")
-    df = customers_df.copy()
     
     # Remove duplicates based on customer_id
-    df = remove_duplicates(df, subset=['customer_id'])
+    # (returns a new dataframe, so the raw input is never modified)
+    df = remove_duplicates(customers_df, subset=['customer_id'])
     
     # Handle missing values
     df = handle_missing_values(df, strategy='drop')
     
-    # Ensure customer_id is integer
-    df['customer_id'] = pd.to_numeric(df['customer_id'], errors='coerce')
-    df = df.dropna(subset=['customer_id'])
-    df['customer_id'] = df['customer_id'].astype(int)
-    
     print(f"✓ Transformed {len(df)} customer records")
     return df
 
@@ -138,31 +150,61 @@ def transform_products_data(products_df):
         pandas.DataFrame: Cleaned products dataframe
     """
     print("\nTransforming Products Data...")
-    df = products_df.copy()
     
     # Remove duplicates based on product_id
-    df = remove_duplicates(df, subset=['product_id'])
+    # (returns a new dataframe, so the raw input is never modified)
+    df = remove_duplicates(products_df, subset=['product_id'])
     
     # Handle missing values
     df = handle_missing_values(df, strategy='drop')
     
-    # Ensure product_id is integer
-    df['product_id'] = pd.to_numeric(df['product_id'], errors='coerce')
-    df = df.dropna(subset=['product_id'])
-    df['product_id'] = df['product_id'].astype(int)
-    
-    # Ensure unit_cost is numeric
-    df['unit_cost'] = pd.to_numeric(df['unit_cost'], errors='coerce')
+    # Default missing unit_cost to 0
     df['unit_cost'] = df['unit_cost'].fillna(0)
     
     print(f"✓ Transformed {len(df)} product records")
     return df
 
 
+def compute_date_parts(days, day, month, quarter, year, weekday, is_weekend):
+    """
+    Fill date part arrays from days since 1970-01-01 in a single pass.
+    Uses Howard Hinnant's civil_from_days algorithm.
+    
+    Args:
+        days: int64 array of days since the Unix epoch
+        day, month, quarter, year, weekday: int32 output arrays
+        is_weekend: bool output array
+    """
+    for i in numba.prange(len(days)):
+        # Shift the epoch to 0000-03-01 so leap days fall at year end
+        z = days[i] + 719468
+        era = z // 146097
+        doe = z - era * 146097
+        yoe = (doe - doe // 1460 + doe // 36524 - doe // 146096) // 365
+        doy = doe - (365 * yoe + yoe // 4 - yoe // 100)
+        mp = (5 * doy + 2) // 153
+        m = mp + 3 if mp < 10 else mp - 9
+        
+        day[i] = doy - (153 * mp + 2) // 5 + 1
+        month[i] = m
+        quarter[i] = (m - 1) // 3 + 1
+        year[i] = yoe + era * 400 + (1 if m <= 2 else 0)
+        
+        # 1970-01-01 was a Thursday (Monday=0)
+        weekday[i] = (days[i] + 3) % 7
+        is_weekend[i] = weekday[i] >= 5
+
+
+if numba is not None:
+    compute_date_parts = numba.njit(parallel=True, cache=True)(compute_date_parts)
+
+
 def create_date_dimension(sales_df):
     """
     Create date dimension table from unique dates in sales data.
     This is a common pattern in data warehousing.
+    Dates of sales that are rejected when loading fact_sales are filtered
+    out when the dates are loaded (see upsert_dim_date() in etl/load.py).
     
     Args:
         sales_df: Sales dataframe with 'sale_date' column
@@ -172,56 +214,61 @@ def create_date_dimension(sales_df):
     """
     print("\nCreating Date Dimension...")
     
-    # Get unique dates from sales data
-    unique_dates = sales_df['sale_date'].unique()
-    
-    date_records = []
-    
-    for date in unique_dates:
-        # Extract date components
-        date_obj = pd.to_datetime(date)
-        
-        day = date_obj.day
-        month = date_obj.month
-        quarter = (month - 1) // 3 + 1
-        year = date_obj.year
-        
-        # Month name
-        month_names = ['January', 'February', 'March', 'April', 'May', 'June',
-                      'July', 'August', 'September', 'October', 'November', 'December']
-        month_name = month_names[month - 1]
-        
-        # Quarter name
-        quarter_name = f"Q{quarter}"
-        
-        # Day of week
-        day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        day_of_week = day_names[date_obj.weekday()]
-        
-        # Check if weekend
-        is_weekend = date_obj.weekday() >= 5
-        
-        date_records.append({
-            'sale_date': date_obj.date(),
-            'day': day,
-            'month': month,
-            'quarter': quarter,
-            'year': year,
-            'month_name': month_name,
-            'quarter_name': quarter_name,
-            'day_of_week': day_of_week,
-            'is_weekend': is_weekend
-        })
-    
-    date_dim = pd.DataFrame(date_records)
-    
-    # Sort by date
-    date_dim = date_dim.sort_values('sale_date').reset_index(drop=True)
+    # Get unique dates from sales data, sorted
+    dates = pd.DatetimeIndex(
+        pd.to_datetime(sales_df['sale_date']).dt.normalize().unique()
+    ).sort_values()
+    
+    if numba is not None and len(dates) > NUMBA_MIN_DATES:
+        # Large dimensions: compute all date parts in one compiled pass
+        days = dates.values.astype('datetime64[D]').astype(np.int64)
+        day, month, quarter, year, weekday = (
+            np.empty(len(days), dtype=np.int32) for _ in range(5)
+        )
+        is_weekend = np.empty(len(days), dtype=np.bool_)
+        compute_date_parts(days, day, month, quarter, year, weekday, is_weekend)
+    else:
+        # Extract all date components at once with vectorized accessors
+        day, month, quarter, year = dates.day, dates.month, dates.quarter, dates.year
+        weekday = dates.weekday
+        is_weekend = weekday >= 5
+    
+    date_dim = pd.DataFrame({
+        'sale_date': dates,
+        'day': day,
+        'month': month,
+        'quarter': quarter,
+        'year': year,
+        'month_name': pd.Categorical.from_codes(month - 1, dtype=MONTH_NAME_DTYPE),
+        'quarter_name': pd.Categorical.from_codes(quarter - 1, dtype=QUARTER_NAME_DTYPE),
+        'day_of_week': pd.Categorical.from_codes(weekday, dtype=DAY_NAME_DTYPE),
+        'is_weekend': is_weekend
+    })
     
     print(f"✓ Created date dimension with {len(date_dim)} unique dates")
     return date_dim
 
 
+def transform_sales_chunks(sales_chunks):
+    """
+    Transform sales data chunk by chunk.
+    Each chunk gets its own date dimension rows so it can be loaded
+    before the next chunk is read. Duplicate sale_ids are removed within
+    a chunk here; a sale_id repeated in a later chunk is skipped when the
+    chunk is loaded (see upsert_fact_sales() in etl/load.py).
+    
+    Args:
+        sales_chunks: Iterable of raw sales dataframes
+    
+    Yields:
+        tuple: (transformed_sales_chunk, date_dimension_chunk)
+    """
+    for sales_df in sales_chunks:
+        sales_clean = transform_sales_data(sales_df)
+        date_dim = create_date_dimension(sales_clean)
+        yield sales_clean, date_dim
+
+
 def transform_all(sales_df, customers_df, products_df):
     """
     Transform all dataframes at once.
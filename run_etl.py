@@ -5,11 +5,25 @@ This script runs the complete ETL pipeline:
 1. Extract data from CSV files
 2. Transform and clean the data
 3. Load data into PostgreSQL data warehouse
+
+Customer and product data are small and handled in full. Sales data is
+streamed in chunks through transform and load, so peak memory depends on
+the chunk size rather than the size of sales.csv. Duplicate sale_ids
+across chunks are tracked by PostgreSQL during the load (one indexed
+integer per sale in a temporary table), not in Python.
 """
 
-from etl.extract import extract_all
-from etl.transform import transform_all
-from etl.load import load_all
+import pandas as pd
+
+from etl.extract import extract_sales_chunks, extract_dimension_data
+from etl.transform import (
+    transform_sales_chunks, transform_customers_data, transform_products_data
+)
+from etl.load import load_all_chunked
+
+# Copy-on-write lets pandas share data between intermediate dataframes
+# instead of copying it, which keeps peak memory down during transform
+pd.set_option('mode.copy_on_write', True)
 
 
 def main():
@@ -22,24 +36,25 @@ def main():
     print()
     
     try:
-        # Step 1: Extract
+        # Step 1: Extract dimension sources (small, read in full, concurrently)
         print("STEP 1: EXTRACTING DATA FROM CSV FILES")
         print("-" * 60)
-        sales, customers, products = extract_all()
+        customers, products = extract_dimension_data()
         print()
         
-        # Step 2: Transform
+        # Step 2: Transform dimension sources
         print("STEP 2: TRANSFORMING DATA")
         print("-" * 60)
-        sales_t, customers_t, products_t, date_dim = transform_all(
-            sales, customers, products
-        )
+        customers_t = transform_customers_data(customers)
+        products_t = transform_products_data(products)
         print()
         
-        # Step 3: Load
+        # Step 3: Load dimensions, then stream sales chunks
+        # (each sales chunk is extracted and transformed as it is loaded)
         print("STEP 3: LOADING DATA INTO DATA WAREHOUSE")
         print("-" * 60)
-        load_all(sales_t, customers_t, products_t, date_dim)
+        sales_chunks = transform_sales_chunks(extract_sales_chunks())
+        load_all_chunked(sales_chunks, customers_t, products_t)
         print()
         
         print("=" * 60)
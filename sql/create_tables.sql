@@ -63,6 +63,8 @@ CREATE TABLE dim_date (
 -- Sales Fact Table
 -- Stores transactional sales data
 -- Uses foreign keys to link to dimension tables
+-- Quantities and prices must be positive (enforced by the database;
+-- the ETL load filters with the same rule, POSITIVE_AMOUNTS_SQL in etl/load.py)
 CREATE TABLE fact_sales (
     sale_id INTEGER PRIMARY KEY,
     date_key INTEGER NOT NULL,
@@ -72,6 +74,7 @@ CREATE TABLE fact_sales (
     unit_price DECIMAL(10,2) NOT NULL,
     total_amount DECIMAL(10,2) NOT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT positive_amounts CHECK (quantity > 0 AND unit_price > 0 AND total_amount > 0),
     FOREIGN KEY (date_key) REFERENCES dim_date(date_key),
     FOREIGN KEY (customer_key) REFERENCES dim_customer(customer_key),
     FOREIGN KEY (product_key) REFERENCES dim_product(product_key)